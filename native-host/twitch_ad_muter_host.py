@@ -15,13 +15,32 @@ Commands:
 - getStatus: Returns current mute state
 """
 
+import atexit
+import ctypes
 import json
+import os
+import select
 import struct
 import subprocess
 import sys
-from datetime import datetime
+import time
 from pathlib import Path
 
+# orjson parses and serializes bytes directly (no intermediate str object)
+# and is several times faster than stdlib json; fall back when unavailable
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# AppKit/Quartz (PyObjC) allow posting the keyboard mute media key, used as
+# a fallback when CoreAudio HAL access is blocked; optional
+try:
+    from AppKit import NSEvent
+    from Quartz import CGEventPost, kCGHIDEventTap
+except ImportError:
+    NSEvent = None
+
 
 # =============================================================================
 # Configuration
@@ -30,6 +49,10 @@ from pathlib import Path
 DEBUG = False
 LOG_FILE_PATH = Path.home() / "Library" / "Logs" / "TwitchAdMuter" / "host.log"
 
+# Allow posting the keyboard mute media key when CoreAudio is unavailable
+# (e.g. HAL access sandboxed) before falling back to osascript
+HID_MUTE_KEY_FALLBACK = True
+
 
 # =============================================================================
 # Logging
@@ -41,23 +64,59 @@ def ensure_log_directory():
         LOG_FILE_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 
-def log(message):
+# Log file handle, opened lazily on first write and kept open (line
+# buffered) so each log call is one write instead of an open/write/close
+_log_file = None
+
+# Timestamps only need second precision, so the formatted string is cached
+# and rebuilt only when the clock ticks over to the next second
+_log_timestamp = ""
+_log_timestamp_second = None
+
+
+def _get_log_file():
+    """Returns the shared log file handle, opening it on first use."""
+    global _log_file
+
+    if _log_file is None:
+        ensure_log_directory()
+        _log_file = open(LOG_FILE_PATH, "a", encoding="utf-8", buffering=1)
+        atexit.register(_log_file.close)
+
+    return _log_file
+
+
+def log(*parts):
     """
     Writes a debug message to the log file.
-    Only logs when DEBUG mode is enabled.
+
+    Accepts multiple arguments and only stringifies them here, so call
+    sites can pass values without paying formatting cost when the message
+    is never written. Rebound to a no-op below when DEBUG is disabled,
+    which also skips the argument formatting entirely.
     """
-    if not DEBUG:
-        return
+    global _log_timestamp, _log_timestamp_second
 
     try:
-        ensure_log_directory()
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(LOG_FILE_PATH, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}] {message}\n")
+        now = int(time.time())
+        if now != _log_timestamp_second:
+            _log_timestamp_second = now
+            _log_timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+
+        message = "".join(str(part) for part in parts)
+        _get_log_file().write(f"[{_log_timestamp}] {message}\n")
     except Exception:
         pass
 
 
+def _log_noop(*parts):
+    """Replacement for log when DEBUG is disabled: does nothing."""
+
+
+if not DEBUG:
+    log = _log_noop
+
+
 # =============================================================================
 # Message Reading Exceptions
 # =============================================================================
@@ -76,6 +135,205 @@ class EndOfInput(Exception):
 # Native Messaging Protocol
 # =============================================================================
 
+# Raw stdio file descriptors. Going through os.read/os.write skips the
+# io.BufferedReader/BufferedWriter layer (per-call lock acquisition and an
+# extra copy) that sys.stdin.buffer/sys.stdout.buffer impose on pipe I/O.
+STDIN_FD = sys.stdin.buffer.fileno()
+STDOUT_FD = sys.stdout.buffer.fileno()
+
+# How much to request per os.read when filling the user-space buffer
+READ_CHUNK_SIZE = 65536
+
+# Largest message the host will accept. Real commands are under 64 bytes,
+# so 4 KB is generous while keeping a hostile length prefix from driving a
+# large allocation and read before validation rejects it.
+MAX_MESSAGE_SIZE = 4096
+
+# Bytes read from stdin but not yet consumed by read_message
+_read_buffer = bytearray()
+
+
+def _read_exact(length):
+    """
+    Reads up to length bytes from stdin, returning fewer only at EOF.
+
+    Bytes are drained from the pipe via os.read into a user-space buffer,
+    so each message costs at most one syscall once the pipe has data.
+
+    Args:
+        length: Number of bytes to read
+
+    Returns:
+        bytes: The data read (shorter than length only when EOF was hit)
+    """
+    while len(_read_buffer) < length:
+        chunk = os.read(STDIN_FD, READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        _read_buffer.extend(chunk)
+
+    data = bytes(_read_buffer[:length])
+    del _read_buffer[:length]
+    return data
+
+
+# Reusable payload buffer. Payloads are parsed in place from this buffer,
+# so steady-state message reads allocate nothing. Sized to the message cap
+# so it never needs to grow for messages that pass validation (the growth
+# branch below is defensive only).
+_payload_buffer = bytearray(MAX_MESSAGE_SIZE)
+
+
+def _read_payload(length):
+    """
+    Reads exactly length bytes of payload into the reusable payload buffer.
+
+    Args:
+        length: Number of payload bytes to read
+
+    Returns:
+        memoryview: View of the payload, only valid until the next call
+            (shorter than length only when EOF was hit)
+    """
+    global _payload_buffer
+
+    if length > len(_payload_buffer):
+        # Rebind rather than resize so any outstanding views stay valid
+        _payload_buffer = bytearray(length)
+
+    view = memoryview(_payload_buffer)[:length]
+
+    # Serve from bytes already buffered by _read_exact first
+    filled = min(len(_read_buffer), length)
+    if filled:
+        view[:filled] = memoryview(_read_buffer)[:filled]
+        del _read_buffer[:filled]
+
+    # Read the rest of the payload directly into the buffer (no temp copies)
+    while filled < length:
+        count = os.readv(STDIN_FD, [view[filled:]])
+        if count == 0:
+            return view[:filled]
+        filled += count
+
+    return view
+
+
+def _write_all(data):
+    """
+    Writes all of data to stdout, retrying on short writes.
+
+    Args:
+        data: Bytes-like object to write
+    """
+    view = memoryview(data)
+    while view:
+        written = os.write(STDOUT_FD, view)
+        view = view[written:]
+
+
+# Response frames queued for the next flush. Responses are only held back
+# while more input is already waiting (see main), so a burst of commands
+# gets one write syscall instead of one per response and single commands
+# keep their current latency.
+_pending_responses = []
+
+# Force a flush once this many buffers are queued even if more input is
+# still waiting, so the queue stays bounded under sustained bursts
+MAX_PENDING_BUFFERS = 256
+
+
+def _stdin_has_pending_data():
+    """
+    Returns True if another message (or part of one) is already waiting.
+
+    A readable stdin can also mean EOF, so readable bytes are pulled into
+    the read buffer to tell the two apart: at EOF there is no more input,
+    and pending responses should be flushed before read_message observes
+    the EOF rather than after.
+    """
+    if _read_buffer:
+        return True
+    try:
+        if not select.select([STDIN_FD], [], [], 0)[0]:
+            return False
+        chunk = os.read(STDIN_FD, READ_CHUNK_SIZE)
+        if not chunk:
+            return False
+        _read_buffer.extend(chunk)
+        return True
+    except Exception:
+        return False
+
+
+# The kernel rejects writev calls with more than IOV_MAX buffers (1024 on
+# both Linux and macOS) with EINVAL, so each call is capped to this many
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = 1024
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+
+def _write_buffers(buffers):
+    """
+    Writes a list of bytes-like objects to stdout with scatter-gather I/O.
+
+    os.writev hands the kernel up to IOV_MAX buffers per syscall without a
+    Python-level concatenation, so length prefixes and payloads never have
+    to be copied into a combined frame. Short writes are handled by
+    trimming the buffer list and retrying. Buffers are removed from the
+    list only once written, so the caller can see what remains if the
+    write raises.
+
+    Args:
+        buffers: List of bytes-like objects to write, consumed in place
+    """
+    if not hasattr(os, "writev"):
+        _write_all(b"".join(buffers))
+        del buffers[:]
+        return
+
+    while buffers:
+        written = os.writev(STDOUT_FD, buffers[:_IOV_MAX])
+
+        # Drop fully written buffers, trim a partially written one
+        while buffers and written >= len(buffers[0]):
+            written -= len(buffers[0])
+            buffers.pop(0)
+        if written:
+            buffers[0] = memoryview(buffers[0])[written:]
+
+
+def flush_responses():
+    """
+    Writes all queued response frames to stdout.
+
+    Write errors are logged and the remaining frames dropped, matching the
+    old per-message write semantics: a dead stdout means the extension
+    side is gone, so there is nowhere left to send them and the main loop
+    should carry on to its clean EOF exit rather than crash.
+    """
+    try:
+        _write_buffers(_pending_responses)
+    except OSError as e:
+        log("Failed to write responses: ", e)
+        del _pending_responses[:]
+
+
+# The extension only ever sends these three commands, and Firefox
+# serializes them without whitespace, so the raw payload bytes can be
+# matched directly and JSON parsing skipped entirely on the hot path.
+# Anything else (reordered keys, extra fields) falls through to the parser.
+_FAST_PATH_MESSAGES = {
+    b'{"command":"mute"}': {"command": "mute"},
+    b'{"command":"unmute"}': {"command": "unmute"},
+    b'{"command":"getStatus"}': {"command": "getStatus"},
+}
+_FAST_PATH_MAX_LENGTH = max(len(payload) for payload in _FAST_PATH_MESSAGES)
+
+
 def read_message():
     """
     Reads a message from stdin using the native messaging protocol.
@@ -92,7 +350,7 @@ def read_message():
         MessageReadError: When message cannot be read or parsed
     """
     # Read the 4-byte length prefix
-    length_bytes = sys.stdin.buffer.read(4)
+    length_bytes = _read_exact(4)
 
     if len(length_bytes) == 0:
         log("EOF received on stdin")
@@ -105,33 +363,44 @@ def read_message():
 
     # Unpack as little-endian unsigned 32-bit integer
     message_length = struct.unpack("<I", length_bytes)[0]
-    log(f"Message length: {message_length}")
+    log("Message length: ", message_length)
 
-    # Sanity check on message length (max 1MB)
-    if message_length > 1024 * 1024:
+    # Reject oversized messages before any payload buffering or reads
+    if message_length > MAX_MESSAGE_SIZE:
         error_msg = f"Message too large: {message_length} bytes"
         log(error_msg)
         raise MessageReadError(error_msg)
 
-    # Read the JSON payload
-    message_bytes = sys.stdin.buffer.read(message_length)
+    # Read the JSON payload into the reusable buffer
+    message_bytes = _read_payload(message_length)
 
     if len(message_bytes) != message_length:
         error_msg = f"Incomplete message: expected {message_length} bytes, got {len(message_bytes)}"
         log(error_msg)
         raise MessageReadError(error_msg)
 
-    # Decode and parse JSON
+    # Fast path: match the known command payloads byte-for-byte
+    if message_length <= _FAST_PATH_MAX_LENGTH:
+        message = _FAST_PATH_MESSAGES.get(bytes(message_bytes))
+        if message is not None:
+            log("Received message: ", message)
+            return message
+
+    # Parse JSON in place (orjson accepts the buffer directly; the stdlib
+    # fallback needs a bytes copy and decode)
     try:
-        message_str = message_bytes.decode("utf-8")
-        message = json.loads(message_str)
-        log(f"Received message: {message}")
+        if orjson is not None:
+            message = orjson.loads(message_bytes)
+        else:
+            message = json.loads(message_bytes.tobytes().decode("utf-8"))
+        log("Received message: ", message)
         return message
     except UnicodeDecodeError as e:
         error_msg = f"Invalid UTF-8 encoding: {e}"
         log(error_msg)
         raise MessageReadError(error_msg)
-    except json.JSONDecodeError as e:
+    except ValueError as e:
+        # Covers json.JSONDecodeError and orjson.JSONDecodeError
         error_msg = f"Invalid JSON: {e}"
         log(error_msg)
         raise MessageReadError(error_msg)
@@ -150,27 +419,40 @@ def write_message(message):
     """
     try:
         # Encode message as JSON
-        message_str = json.dumps(message)
-        message_bytes = message_str.encode("utf-8")
+        if orjson is not None:
+            message_bytes = orjson.dumps(message)
+        else:
+            message_bytes = json.dumps(message).encode("utf-8")
 
-        # Write length prefix (little-endian uint32)
-        length_bytes = struct.pack("<I", len(message_bytes))
-        sys.stdout.buffer.write(length_bytes)
+        # Queue the length prefix (little-endian uint32) and payload as
+        # separate buffers; the scatter-gather flush writes them without
+        # ever copying them into a combined frame
+        _pending_responses.append(struct.pack("<I", len(message_bytes)))
+        _pending_responses.append(message_bytes)
 
-        # Write message payload
-        sys.stdout.buffer.write(message_bytes)
+        log("Sent message: ", message)
+    except Exception as e:
+        log("Failed to write message: ", e)
 
-        # Flush to ensure immediate delivery
-        sys.stdout.buffer.flush()
 
-        log(f"Sent message: {message}")
-    except Exception as e:
-        log(f"Failed to write message: {e}")
+def _build_frame(payload):
+    """Builds a complete protocol frame (length prefix plus payload)."""
+    return struct.pack("<I", len(payload)) + payload
+
+
+# The non-error responses form a tiny fixed set, so their frames are built
+# once at import instead of round-tripping through JSON encode and
+# struct.pack on every send. Only error responses (variable text) still go
+# through write_message.
+_FRAME_SUCCESS = _build_frame(b'{"success":true}')
+_FRAME_MUTED_TRUE = _build_frame(b'{"muted":true}')
+_FRAME_MUTED_FALSE = _build_frame(b'{"muted":false}')
 
 
 def send_success_response():
     """Sends a success response."""
-    write_message({"success": True})
+    _pending_responses.append(_FRAME_SUCCESS)
+    log('Sent message: {"success": true}')
 
 
 def send_error_response(error_message):
@@ -190,36 +472,385 @@ def send_status_response(is_muted):
     Args:
         is_muted: Boolean indicating if system audio is muted
     """
-    write_message({"muted": is_muted})
+    _pending_responses.append(_FRAME_MUTED_TRUE if is_muted else _FRAME_MUTED_FALSE)
+    log("Sent status: muted=", is_muted)
+
+
+# =============================================================================
+# System Audio Control (macOS) - CoreAudio
+# =============================================================================
+
+# Property selectors and scopes from CoreAudio/AudioHardware.h (FourCC codes)
+kAudioObjectSystemObject = 1
+kAudioHardwarePropertyDefaultOutputDevice = struct.unpack(">I", b"dOut")[0]
+kAudioDevicePropertyMute = struct.unpack(">I", b"mute")[0]
+kAudioObjectPropertyScopeGlobal = struct.unpack(">I", b"glob")[0]
+kAudioObjectPropertyScopeOutput = struct.unpack(">I", b"outp")[0]
+kAudioObjectPropertyElementMaster = 0
+
+# Lazily loaded CoreAudio framework handle; False means loading failed
+_coreaudio_lib = None
+
+
+class _AudioObjectPropertyAddress(ctypes.Structure):
+    """Mirror of CoreAudio's AudioObjectPropertyAddress struct."""
+    _fields_ = [
+        ("mSelector", ctypes.c_uint32),
+        ("mScope", ctypes.c_uint32),
+        ("mElement", ctypes.c_uint32),
+    ]
+
+
+def _load_coreaudio():
+    """
+    Loads the CoreAudio framework via ctypes.
+
+    AppleScript's "set volume with output muted" ultimately sets the default
+    output device's mute property through the CoreAudio HAL. Calling the HAL
+    directly skips the AppleScript interpreter and Apple Events dispatch.
+
+    Returns:
+        ctypes.CDLL or None: The framework handle, or None if unavailable
+    """
+    global _coreaudio_lib
+
+    if _coreaudio_lib is None:
+        try:
+            _coreaudio_lib = ctypes.CDLL(
+                "/System/Library/Frameworks/CoreAudio.framework/CoreAudio"
+            )
+            log("Loaded CoreAudio framework")
+        except OSError as e:
+            log("Failed to load CoreAudio framework: ", e)
+            _coreaudio_lib = False
+
+    return _coreaudio_lib or None
+
+
+def _coreaudio_default_output_device(lib):
+    """
+    Looks up the default audio output device.
+
+    Args:
+        lib: Loaded CoreAudio framework handle
+
+    Returns:
+        int or None: The AudioObjectID of the default output device
+    """
+    address = _AudioObjectPropertyAddress(
+        kAudioHardwarePropertyDefaultOutputDevice,
+        kAudioObjectPropertyScopeGlobal,
+        kAudioObjectPropertyElementMaster,
+    )
+    device_id = ctypes.c_uint32(0)
+    size = ctypes.c_uint32(ctypes.sizeof(device_id))
+
+    status = lib.AudioObjectGetPropertyData(
+        kAudioObjectSystemObject,
+        ctypes.byref(address),
+        0,
+        None,
+        ctypes.byref(size),
+        ctypes.byref(device_id),
+    )
+
+    if status != 0 or device_id.value == 0:
+        log("Default output device lookup failed: status ", status)
+        return None
+
+    return device_id.value
+
+
+def _coreaudio_mute_address():
+    """Builds the property address for the output mute control."""
+    return _AudioObjectPropertyAddress(
+        kAudioDevicePropertyMute,
+        kAudioObjectPropertyScopeOutput,
+        kAudioObjectPropertyElementMaster,
+    )
+
+
+def _coreaudio_set_mute(muted):
+    """
+    Sets the default output device's mute state via the CoreAudio HAL.
+
+    Args:
+        muted: Boolean mute state to apply
+
+    Returns:
+        bool: True if the property was set successfully
+    """
+    lib = _load_coreaudio()
+    if lib is None:
+        return False
+
+    device_id = _coreaudio_default_output_device(lib)
+    if device_id is None:
+        return False
+
+    address = _coreaudio_mute_address()
+    value = ctypes.c_uint32(1 if muted else 0)
+
+    status = lib.AudioObjectSetPropertyData(
+        device_id,
+        ctypes.byref(address),
+        0,
+        None,
+        ctypes.sizeof(value),
+        ctypes.byref(value),
+    )
+
+    if status != 0:
+        log("CoreAudio set mute failed: status ", status)
+        return False
+
+    return True
+
+
+def _coreaudio_get_mute():
+    """
+    Reads the default output device's mute state via the CoreAudio HAL.
+
+    Returns:
+        bool or None: The mute state, or None if it could not be read
+    """
+    lib = _load_coreaudio()
+    if lib is None:
+        return None
+
+    device_id = _coreaudio_default_output_device(lib)
+    if device_id is None:
+        return None
+
+    address = _coreaudio_mute_address()
+    value = ctypes.c_uint32(0)
+    size = ctypes.c_uint32(ctypes.sizeof(value))
+
+    status = lib.AudioObjectGetPropertyData(
+        device_id,
+        ctypes.byref(address),
+        0,
+        None,
+        ctypes.byref(size),
+        ctypes.byref(value),
+    )
+
+    if status != 0:
+        log("CoreAudio get mute failed: status ", status)
+        return None
+
+    return value.value != 0
 
 
 # =============================================================================
-# System Audio Control (macOS)
+# System Audio Control (macOS) - media key fallback
 # =============================================================================
 
-def execute_osascript(script):
+# NSEvent constants for synthesizing a media key press
+NSSystemDefined = 14
+NSSystemDefinedMediaKeySubtype = 8
+NX_KEYTYPE_MUTE = 7
+
+
+def _post_mute_media_key():
     """
-    Executes an AppleScript command using osascript.
+    Posts a press-and-release of the keyboard mute media key.
+
+    Media keys are NSSystemDefined events (subtype 8) rather than regular
+    keyboard events, so they have to be built through NSEvent and posted to
+    the HID event tap.
+    """
+    for key_down in (True, False):
+        flags = 0xA00 if key_down else 0xB00
+        data1 = (NX_KEYTYPE_MUTE << 16) | ((0xA if key_down else 0xB) << 8)
+        event = NSEvent.otherEventWithType_location_modifierFlags_timestamp_windowNumber_context_subtype_data1_data2_(
+            NSSystemDefined,
+            (0, 0),
+            flags,
+            0,
+            0,
+            0,
+            NSSystemDefinedMediaKeySubtype,
+            data1,
+            -1,
+        )
+        CGEventPost(kCGHIDEventTap, event.CGEvent())
+
+
+def _hid_set_mute(muted):
+    """
+    Applies the desired mute state by posting the mute media key.
+
+    The media key toggles rather than sets, so this path only acts when the
+    cached mute state is known and still fresh (external changes like the
+    hardware mute key invalidate it after MUTE_CACHE_TTL, and toggling from
+    a stale state could invert the intent): it presses the key when the
+    state differs from the target and does nothing when it already matches.
+
+    The cache timestamp is refreshed only when the key is actually posted;
+    the no-op match branch leaves it alone, since the state was not
+    re-verified and the TTL must keep bounding drift from external changes.
+
+    Args:
+        muted: Boolean mute state to apply
+
+    Returns:
+        bool: True if the state was applied (or already matched)
+    """
+    if not HID_MUTE_KEY_FALLBACK or NSEvent is None:
+        return False
+
+    if _cached_mute_state is None:
+        return False
+
+    if time.monotonic() - _cached_mute_state_time >= MUTE_CACHE_TTL:
+        return False
+
+    if _cached_mute_state == muted:
+        return True
+
+    try:
+        _post_mute_media_key()
+        _update_mute_cache(muted)
+        return True
+    except Exception as e:
+        log("Failed to post mute media key: ", e)
+        return False
+
+
+# =============================================================================
+# System Audio Control (macOS) - osascript fallback
+# =============================================================================
+
+# Timeout in seconds for osascript calls
+OSASCRIPT_TIMEOUT = 5
+
+# Persistent osascript coprocess (see _start_osascript_process)
+_osascript_process = None
+
+
+def _start_osascript_process():
+    """
+    Starts a persistent osascript coprocess in interactive mode.
+
+    Spawning osascript per command costs a fork/exec plus AppleScript
+    interpreter startup (~100ms or more per call). Interactive mode (-i)
+    keeps a single interpreter alive for the lifetime of the host, so each
+    command only pays pipe I/O plus script evaluation. The -s s flag makes
+    results print in source form, one line per evaluated expression.
+
+    Returns:
+        subprocess.Popen or None: The running coprocess, or None on failure
+    """
+    global _osascript_process
+
+    try:
+        _osascript_process = subprocess.Popen(
+            ["osascript", "-i", "-s", "s"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0
+        )
+        log("Started persistent osascript process")
+    except Exception as e:
+        log("Failed to start osascript process: ", e)
+        _osascript_process = None
+
+    return _osascript_process
+
+
+def _stop_osascript_process():
+    """Closes the coprocess stdin so osascript exits cleanly."""
+    global _osascript_process
+
+    process = _osascript_process
+    _osascript_process = None
+
+    if process is None:
+        return
+
+    try:
+        process.stdin.close()
+        process.wait(timeout=1)
+    except Exception:
+        try:
+            process.kill()
+        except Exception:
+            pass
+
+
+atexit.register(_stop_osascript_process)
+
+
+def _drain_osascript_output(process):
+    """
+    Discards any pending output on the coprocess stdout and stderr pipes.
+
+    Stray stdout from earlier evaluations is dropped to keep result reads
+    aligned with the command that produced them, and stderr (AppleScript
+    error text) is drained so a long-lived coprocess can never stall on a
+    full stderr pipe.
+    """
+    try:
+        for pipe in (process.stdout, process.stderr):
+            while select.select([pipe], [], [], 0)[0]:
+                if not pipe.readline():
+                    break
+    except Exception:
+        pass
+
+
+def _read_osascript_error(process):
+    """
+    Returns any AppleScript error text waiting on the coprocess stderr.
+
+    Returns:
+        str or None: The last pending error line, or None if stderr is quiet
+    """
+    error_line = None
+    try:
+        while select.select([process.stderr], [], [], 0)[0]:
+            line = process.stderr.readline()
+            if not line:
+                break
+            error_line = line
+    except Exception:
+        pass
+
+    if error_line:
+        return error_line.decode("utf-8", "replace").strip()
+    return None
+
+
+def _execute_osascript_oneshot(script):
+    """
+    Executes an AppleScript command by spawning a one-shot osascript process.
+
+    Used as a fallback when the persistent coprocess is unavailable.
 
     Args:
         script: AppleScript code to execute
 
     Returns:
-        tuple: (success: bool, output: str or None, error: str or None)
+        tuple: (success: bool, output: bytes or None, error: str or None)
     """
     try:
+        # Keep the output as bytes; decoding is only needed for error text
         result = subprocess.run(
             ["osascript", "-e", script],
             capture_output=True,
-            text=True,
-            timeout=5
+            timeout=OSASCRIPT_TIMEOUT
         )
 
         if result.returncode == 0:
             return True, result.stdout.strip(), None
         else:
-            error_msg = result.stderr.strip() if result.stderr else "Unknown osascript error"
-            log(f"osascript failed: {error_msg}")
+            if result.stderr:
+                error_msg = result.stderr.decode("utf-8", "replace").strip()
+            else:
+                error_msg = "Unknown osascript error"
+            log("osascript failed: ", error_msg)
             return False, None, error_msg
 
     except subprocess.TimeoutExpired:
@@ -229,10 +860,102 @@ def execute_osascript(script):
         log("osascript not found")
         return False, None, "osascript not found"
     except Exception as e:
-        log(f"osascript execution failed: {e}")
+        log("osascript execution failed: ", e)
         return False, None, str(e)
 
 
+def execute_osascript(script, expects_result=True):
+    """
+    Executes an AppleScript command using the persistent osascript coprocess.
+
+    The script is written as a single line to the coprocess stdin and one
+    result line is read back from stdout with a timeout. Statements with no
+    result of their own (e.g. "set volume ...") are followed by a sentinel
+    expression: reading the sentinel's line back confirms the statement was
+    actually evaluated, preserving the error semantics of the one-shot
+    path. AppleScript errors are surfaced from stderr. Falls back to a
+    one-shot osascript process if the coprocess cannot be started.
+
+    Args:
+        script: AppleScript code to execute (must be a single line)
+        expects_result: Whether the script itself produces an output line
+
+    Returns:
+        tuple: (success: bool, output: bytes or None, error: str or None)
+    """
+    process = _osascript_process
+    if process is None or process.poll() is not None:
+        process = _start_osascript_process()
+    if process is None:
+        return _execute_osascript_oneshot(script)
+
+    try:
+        _drain_osascript_output(process)
+
+        command = script.encode("utf-8") + b"\n"
+        if not expects_result:
+            # Interactive mode evaluates line by line, so the sentinel only
+            # prints once the statement before it has been evaluated
+            command += b'"ok"\n'
+        process.stdin.write(command)
+        process.stdin.flush()
+
+        readable, _, _ = select.select(
+            [process.stdout, process.stderr], [], [], OSASCRIPT_TIMEOUT
+        )
+
+        if process.stderr in readable:
+            error_msg = _read_osascript_error(process)
+            if error_msg:
+                log("osascript failed: ", error_msg)
+                return False, None, error_msg
+
+        if process.stdout not in readable:
+            log("osascript command timed out")
+            _stop_osascript_process()
+            return False, None, "Command timed out"
+
+        line = process.stdout.readline()
+        if not line:
+            # The coprocess died mid-command; retry once via the one-shot path
+            log("osascript process closed its stdout")
+            _stop_osascript_process()
+            return _execute_osascript_oneshot(script)
+
+        # Catch errors whose text arrived alongside the result line
+        error_msg = _read_osascript_error(process)
+        if error_msg:
+            log("osascript failed: ", error_msg)
+            return False, None, error_msg
+
+        if not expects_result:
+            return True, None, None
+
+        return True, line.strip(), None
+
+    except Exception as e:
+        log("osascript execution failed: ", e)
+        _stop_osascript_process()
+        return False, None, str(e)
+
+
+# The host is the only mutator of system mute state in normal operation, so
+# getStatus can usually answer from this cache instead of querying the OS.
+# The cache expires after a few seconds so external volume changes (keyboard
+# mute key, menu bar slider) eventually reconcile.
+MUTE_CACHE_TTL = 5
+
+_cached_mute_state = None
+_cached_mute_state_time = 0.0
+
+
+def _update_mute_cache(is_muted):
+    """Records the last known mute state and when it was observed."""
+    global _cached_mute_state, _cached_mute_state_time
+    _cached_mute_state = is_muted
+    _cached_mute_state_time = time.monotonic()
+
+
 def mute_system_audio():
     """
     Mutes the system audio output.
@@ -241,7 +964,17 @@ def mute_system_audio():
         tuple: (success: bool, error: str or None)
     """
     log("Executing mute command")
-    success, _, error = execute_osascript("set volume with output muted")
+
+    if _coreaudio_set_mute(True):
+        _update_mute_cache(True)
+        return True, None
+
+    if _hid_set_mute(True):
+        return True, None
+
+    success, _, error = execute_osascript("set volume with output muted", expects_result=False)
+    if success:
+        _update_mute_cache(True)
     return success, error
 
 
@@ -253,7 +986,17 @@ def unmute_system_audio():
         tuple: (success: bool, error: str or None)
     """
     log("Executing unmute command")
-    success, _, error = execute_osascript("set volume without output muted")
+
+    if _coreaudio_set_mute(False):
+        _update_mute_cache(False)
+        return True, None
+
+    if _hid_set_mute(False):
+        return True, None
+
+    success, _, error = execute_osascript("set volume without output muted", expects_result=False)
+    if success:
+        _update_mute_cache(False)
     return success, error
 
 
@@ -261,17 +1004,33 @@ def get_mute_status():
     """
     Gets the current mute status of system audio.
 
+    Answers from the mute state cache when it is fresh; only consults the OS
+    on cold start or after the cache TTL expires.
+
     Returns:
         tuple: (success: bool, is_muted: bool or None, error: str or None)
     """
+    if _cached_mute_state is not None:
+        if time.monotonic() - _cached_mute_state_time < MUTE_CACHE_TTL:
+            log("Mute status (cached): ", _cached_mute_state)
+            return True, _cached_mute_state, None
+
     log("Getting mute status")
+
+    is_muted = _coreaudio_get_mute()
+    if is_muted is not None:
+        log("Mute status: ", is_muted)
+        _update_mute_cache(is_muted)
+        return True, is_muted, None
+
     success, output, error = execute_osascript("output muted of (get volume settings)")
 
     if not success:
         return False, None, error
 
-    is_muted = output.lower() == "true"
-    log(f"Mute status: {is_muted}")
+    is_muted = output.lower() == b"true"
+    log("Mute status: ", is_muted)
+    _update_mute_cache(is_muted)
     return True, is_muted, None
 
 
@@ -279,6 +1038,42 @@ def get_mute_status():
 # Command Processing
 # =============================================================================
 
+def _handle_mute():
+    """Handles the mute command."""
+    success, error = mute_system_audio()
+    if success:
+        send_success_response()
+    else:
+        send_error_response(error or "Failed to mute")
+
+
+def _handle_unmute():
+    """Handles the unmute command."""
+    success, error = unmute_system_audio()
+    if success:
+        send_success_response()
+    else:
+        send_error_response(error or "Failed to unmute")
+
+
+def _handle_get_status():
+    """Handles the getStatus command."""
+    success, is_muted, error = get_mute_status()
+    if success:
+        send_status_response(is_muted)
+    else:
+        send_error_response(error or "Failed to get status")
+
+
+# Command names map straight to their handlers, so dispatch (and validation
+# of the command name) is a single dict lookup
+COMMAND_HANDLERS = {
+    "mute": _handle_mute,
+    "unmute": _handle_unmute,
+    "getStatus": _handle_get_status,
+}
+
+
 def process_command(message):
     """
     Processes a command message and sends appropriate response.
@@ -298,32 +1093,15 @@ def process_command(message):
         send_error_response("No command specified")
         return
 
-    log(f"Processing command: {command}")
-
-    if command == "mute":
-        success, error = mute_system_audio()
-        if success:
-            send_success_response()
-        else:
-            send_error_response(error or "Failed to mute")
-
-    elif command == "unmute":
-        success, error = unmute_system_audio()
-        if success:
-            send_success_response()
-        else:
-            send_error_response(error or "Failed to unmute")
-
-    elif command == "getStatus":
-        success, is_muted, error = get_mute_status()
-        if success:
-            send_status_response(is_muted)
-        else:
-            send_error_response(error or "Failed to get status")
+    log("Processing command: ", command)
 
-    else:
-        log(f"Unknown command: {command}")
+    handler = COMMAND_HANDLERS.get(command)
+    if handler is None:
+        log("Unknown command: ", command)
         send_error_response(f"Unknown command: {command}")
+        return
+
+    handler()
 
 
 # =============================================================================
@@ -346,14 +1124,22 @@ def main():
                 log("End of input received, exiting")
                 break
             except MessageReadError as e:
-                log(f"Message read error: {e}")
+                log("Message read error: ", e)
                 send_error_response(str(e))
 
+            # Flush once the input burst is drained (or the queue is full),
+            # so back-to-back commands share a single response write while
+            # the queue stays bounded
+            if (len(_pending_responses) >= MAX_PENDING_BUFFERS
+                    or not _stdin_has_pending_data()):
+                flush_responses()
+
     except KeyboardInterrupt:
         log("Received keyboard interrupt")
     except Exception as e:
-        log(f"Unexpected error in main loop: {e}")
+        log("Unexpected error in main loop: ", e)
     finally:
+        flush_responses()
         log("Native messaging host shutting down")
 
     sys.exit(0)